@@ -1,9 +1,11 @@
 import streamlit as st
 import pandas as pd
-from inventory_analyzer import InventoryAnalyzer
-from visualizations import create_velocity_chart, create_stock_level_chart, create_reorder_chart
+import numpy as np
+from inventory_analyzer import run_inventory_analysis
+from visualizations import build_chart_inputs, create_velocity_chart, create_stock_level_chart, create_reorder_chart
 from data_processor import DataProcessor
-from utils import export_to_csv, validate_file_format
+from utils import export_analysis, validate_file_format
+import hashlib
 import io
 
 # Configure page
@@ -14,53 +16,23 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Initialize session state
-if 'data' not in st.session_state:
-    st.session_state.data = None
-if 'analyzer' not in st.session_state:
-    st.session_state.analyzer = None
-if 'processed_data' not in st.session_state:
-    st.session_state.processed_data = None
+# Initialize session state. Only the last good upload's (content key, name)
+# is kept here; the parsed frame lives in the load cache.
+if 'upload' not in st.session_state:
+    st.session_state.upload = None
 
-def main():
-    st.title("📦 Inventory Management Dashboard")
-    st.markdown("Upload your inventory data to analyze sales velocity and get reorder recommendations")
-    
-    # Sidebar for file upload and controls
-    with st.sidebar:
-        st.header("Data Upload")
-        uploaded_file = st.file_uploader(
-            "Choose a CSV or Excel file",
-            type=['csv', 'xlsx', 'xls'],
-            help="Upload your inventory data with columns: Item no, Description, Inventory, Sales (Qty.), Average Cost, LDC"
-        )
-        
-        if uploaded_file is not None:
-            if validate_file_format(uploaded_file):
-                try:
-                    # Process uploaded file
-                    processor = DataProcessor()
-                    data = processor.load_data(uploaded_file)
-                    
-                    if data is not None and not data.empty:
-                        st.session_state.data = data
-                        st.session_state.analyzer = InventoryAnalyzer(data)
-                        st.session_state.processed_data = st.session_state.analyzer.analyze_inventory()
-                        st.success(f"✅ Data loaded successfully! {len(data)} products found.")
-                    else:
-                        st.error("❌ No data found in the uploaded file.")
-                        
-                except Exception as e:
-                    st.error(f"❌ Error processing file: {str(e)}")
-            else:
-                st.error("❌ Invalid file format. Please upload a CSV or Excel file.")
+@st.fragment
+def _analysis_view(cleaned_data: pd.DataFrame, data_key: str):
+    """
+    Analysis settings and all threshold-dependent output. Runs as a fragment
+    so slider and filter changes rerun only this section, not the upload.
+    """
+    with st.expander("Analysis Settings", expanded=True):
+        # Velocity thresholds
+        st.subheader("Sales Velocity Thresholds")
+        col1, col2 = st.columns(2)
         
-        # Configuration options
-        if st.session_state.data is not None:
-            st.header("Analysis Settings")
-            
-            # Velocity thresholds
-            st.subheader("Sales Velocity Thresholds")
+        with col1:
             slow_threshold = st.slider(
                 "Slow Moving Threshold (units/day)",
                 min_value=0.1,
@@ -69,7 +41,8 @@ def main():
                 step=0.1,
                 help="Products selling below this rate are considered slow-moving"
             )
-            
+        
+        with col2:
             fast_threshold = st.slider(
                 "Fast Moving Threshold (units/day)",
                 min_value=1.0,
@@ -78,230 +51,280 @@ def main():
                 step=0.5,
                 help="Products selling above this rate are considered fast-moving"
             )
-            
-            # Update thresholds if changed
-            if (st.session_state.analyzer.slow_threshold != slow_threshold or 
-                st.session_state.analyzer.fast_threshold != fast_threshold):
-                st.session_state.analyzer.slow_threshold = slow_threshold
-                st.session_state.analyzer.fast_threshold = fast_threshold
-                st.session_state.processed_data = st.session_state.analyzer.analyze_inventory()
-                st.rerun()
     
-    # Main content area
-    if st.session_state.processed_data is not None:
-        data = st.session_state.processed_data
+    # The threshold-independent analysis is shared across sessions by file
+    # hash, so moving a slider only recomputes the product categories
+    result = run_inventory_analysis(cleaned_data, data_key, slow_threshold, fast_threshold)
+    data, metrics = result.data, result.metrics
+    
+    # Key financial metrics - Top row
+    col1, col2, col3, col4, col5 = st.columns(5)
+    
+    with col1:
+        st.metric("Total Value", f"BHD {metrics['total_value']:,.2f}")
+    
+    with col2:
+        st.metric("Total Sales", f"BHD {metrics['total_sales']:,.2f}")
+    
+    with col3:
+        st.metric("Sale Qty", f"{metrics['sale_qty']:,.0f}")
+    
+    with col4:
+        st.metric("Sale LCY", f"BHD {metrics['sale_lcy']:,.2f}")
+    
+    with col5:
+        st.metric("Purchase LCY", f"BHD {metrics['purchase_lcy']:,.2f}")
+    
+    # Product category metrics - Second row
+    st.markdown("---")
+    col1, col2, col3, col4 = st.columns(4)
+    
+    # Counts, totals and chart rows for the metrics and charts, computed once
+    chart_inputs = build_chart_inputs(data)
+    category_counts = chart_inputs['category_counts']
+    
+    with col1:
+        total_products = len(data)
+        st.metric("Total Products", total_products)
+    
+    with col2:
+        slow_moving = category_counts.get('Slow Moving', 0)
+        st.metric("Slow Moving", slow_moving, delta=f"{slow_moving/total_products*100:.1f}%")
+    
+    with col3:
+        fast_moving = category_counts.get('Fast Moving', 0)
+        st.metric("Fast Moving", fast_moving, delta=f"{fast_moving/total_products*100:.1f}%")
+    
+    with col4:
+        best_selling = category_counts.get('Best Selling', 0)
+        st.metric("Best Selling", best_selling, delta=f"{best_selling/total_products*100:.1f}%")
+    
+    # Tabs for different views
+    tab1, tab2, tab3, tab4 = st.tabs(["📊 Overview", "🔍 Product Analysis", "📋 Reorder Recommendations", "📤 Export"])
+    
+    with tab1:
+        st.header("Inventory Overview")
         
-        # Key financial metrics - Top row
-        col1, col2, col3, col4, col5 = st.columns(5)
+        col1, col2 = st.columns(2)
         
         with col1:
-            total_value = data['Inventory_Value'].sum()
-            st.metric("Total Value", f"BHD {total_value:,.2f}")
+            # Velocity distribution chart
+            velocity_fig = create_velocity_chart(chart_inputs)
+            st.plotly_chart(velocity_fig, use_container_width=True)
         
         with col2:
-            total_sales = data['Monthly_Sales_Value'].sum()
-            st.metric("Total Sales", f"BHD {total_sales:,.2f}")
-        
-        with col3:
-            sale_qty = data['Sales_Last_30_Days'].sum()
-            st.metric("Sale Qty", f"{sale_qty:,.0f}")
+            # Stock level distribution
+            stock_fig = create_stock_level_chart(chart_inputs)
+            st.plotly_chart(stock_fig, use_container_width=True)
         
-        with col4:
-            # Use actual Sales LCY if available, otherwise fallback to Monthly Sales Value
-            if 'Sales_LCY' in data.columns:
-                sale_lcy = data['Sales_LCY'].sum()
-            else:
-                sale_lcy = data['Monthly_Sales_Value'].sum()
-            st.metric("Sale LCY", f"BHD {sale_lcy:,.2f}")
-        
-        with col5:
-            # Use actual Purchase LCY if available, otherwise calculate from reorder quantities
-            if 'Purchase_LCY' in data.columns:
-                purchase_lcy = data['Purchase_LCY'].sum()
-            else:
-                purchase_lcy = (data['Reorder_Quantity'] * data['Unit_Cost']).sum()
-            st.metric("Purchase LCY", f"BHD {purchase_lcy:,.2f}")
+        # Category breakdown table
+        st.subheader("Category Summary")
+        # Group on the categorical codes in appearance order, then order the
+        # (at most three) result rows by category
+        category_summary = data.groupby('Category', observed=True, sort=False).agg(**{
+            'Total Stock': ('Current_Stock', 'sum'),
+            'Avg Stock': ('Current_Stock', 'mean'),
+            'Avg Velocity': ('Sales_Velocity', 'mean'),
+            'Avg Days Remaining': ('Days_Stock_Remaining', 'mean'),
+            'Total Reorder Qty': ('Reorder_Quantity', 'sum')
+        }).sort_index().round(2)
+        st.dataframe(category_summary, use_container_width=True)
+    
+    with tab2:
+        st.header("Product Analysis")
         
-        # Product category metrics - Second row
-        st.markdown("---")
-        col1, col2, col3, col4 = st.columns(4)
+        # Filters
+        col1, col2, col3 = st.columns(3)
         
         with col1:
-            total_products = len(data)
-            st.metric("Total Products", total_products)
+            category_filter = st.selectbox(
+                "Filter by Category",
+                options=['All'] + list(data['Category'].unique())
+            )
         
         with col2:
-            slow_moving = len(data[data['Category'] == 'Slow Moving'])
-            st.metric("Slow Moving", slow_moving, delta=f"{slow_moving/total_products*100:.1f}%")
+            search_term = st.text_input("Search Products", placeholder="Enter product name...")
         
         with col3:
-            fast_moving = len(data[data['Category'] == 'Fast Moving'])
-            st.metric("Fast Moving", fast_moving, delta=f"{fast_moving/total_products*100:.1f}%")
-        
-        with col4:
-            best_selling = len(data[data['Category'] == 'Best Selling'])
-            st.metric("Best Selling", best_selling, delta=f"{best_selling/total_products*100:.1f}%")
-        
-        # Tabs for different views
-        tab1, tab2, tab3, tab4 = st.tabs(["📊 Overview", "🔍 Product Analysis", "📋 Reorder Recommendations", "📤 Export"])
-        
-        with tab1:
-            st.header("Inventory Overview")
-            
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                # Velocity distribution chart
-                velocity_fig = create_velocity_chart(data)
-                st.plotly_chart(velocity_fig, use_container_width=True)
-            
-            with col2:
-                # Stock level distribution
-                stock_fig = create_stock_level_chart(data)
-                st.plotly_chart(stock_fig, use_container_width=True)
-            
-            # Category breakdown table
-            st.subheader("Category Summary")
-            category_summary = data.groupby('Category').agg({
-                'Current_Stock': ['sum', 'mean'],
-                'Sales_Velocity': 'mean',
-                'Days_Stock_Remaining': 'mean',
-                'Reorder_Quantity': 'sum'
-            }).round(2)
-            
-            category_summary.columns = ['Total Stock', 'Avg Stock', 'Avg Velocity', 'Avg Days Remaining', 'Total Reorder Qty']
-            st.dataframe(category_summary, use_container_width=True)
-        
-        with tab2:
-            st.header("Product Analysis")
-            
-            # Filters
-            col1, col2, col3 = st.columns(3)
-            
-            with col1:
-                category_filter = st.selectbox(
-                    "Filter by Category",
-                    options=['All'] + list(data['Category'].unique())
-                )
-            
-            with col2:
-                search_term = st.text_input("Search Products", placeholder="Enter product name...")
-            
-            with col3:
-                sort_by = st.selectbox(
-                    "Sort by",
-                    options=['Product_Name', 'Sales_Velocity', 'Current_Stock', 'Days_Stock_Remaining', 'Reorder_Quantity']
+            sort_by = st.selectbox(
+                "Sort by",
+                options=['Product_Name', 'Sales_Velocity', 'Current_Stock', 'Days_Stock_Remaining', 'Reorder_Quantity']
+            )
+        
+        # Display table with key columns
+        display_columns = [
+            'Product_Name', 'Category', 'Current_Stock', 'Sales_Velocity', 
+            'Days_Stock_Remaining', 'Reorder_Quantity', 'Reorder_Status'
+        ]
+        
+        # Apply filters as a single mask; the view is only read for display
+        mask = np.ones(len(data), dtype=bool)
+        
+        if category_filter != 'All':
+            mask &= (data['Category'] == category_filter).to_numpy()
+        
+        if search_term:
+            mask &= data['Product_Name'].str.contains(
+                search_term, case=False, na=False, regex=False
+            ).to_numpy(dtype=bool)
+        
+        filtered_data = data.loc[mask, display_columns].sort_values(sort_by, ascending=False)
+        
+        # Display filtered results
+        st.subheader(f"Products ({len(filtered_data)} found)")
+        
+        st.dataframe(
+            filtered_data,
+            use_container_width=True,
+            column_config={
+                'Sales_Velocity': st.column_config.NumberColumn(
+                    'Sales Velocity',
+                    help='Units sold per day',
+                    format='%.2f'
+                ),
+                'Days_Stock_Remaining': st.column_config.NumberColumn(
+                    'Days Stock Remaining',
+                    help='Days until stock runs out',
+                    format='%.1f'
+                ),
+                'Reorder_Quantity': st.column_config.NumberColumn(
+                    'Reorder Quantity',
+                    help='Recommended reorder quantity',
+                    format='%.0f'
                 )
-            
-            # Apply filters
-            filtered_data = data.copy()
-            
-            if category_filter != 'All':
-                filtered_data = filtered_data[filtered_data['Category'] == category_filter]
-            
-            if search_term:
-                filtered_data = filtered_data[
-                    filtered_data['Product_Name'].str.contains(search_term, case=False, na=False)
-                ]
-            
-            # Sort data
-            filtered_data = filtered_data.sort_values(sort_by, ascending=False)
-            
-            # Display filtered results
-            st.subheader(f"Products ({len(filtered_data)} found)")
-            
-            # Display table with key columns
-            display_columns = [
-                'Product_Name', 'Category', 'Current_Stock', 'Sales_Velocity', 
-                'Days_Stock_Remaining', 'Reorder_Quantity', 'Reorder_Status'
-            ]
-            
+            }
+        )
+    
+    with tab3:
+        st.header("Reorder Recommendations")
+        
+        # Filter for products that need reordering
+        reorder_needed = data.iloc[result.reorder_now_idx]
+        reorder_soon = data.iloc[result.reorder_soon_idx]
+        
+        if not reorder_needed.empty:
+            st.subheader("🚨 Immediate Reorder Required")
             st.dataframe(
-                filtered_data[display_columns],
-                use_container_width=True,
-                column_config={
-                    'Sales_Velocity': st.column_config.NumberColumn(
-                        'Sales Velocity',
-                        help='Units sold per day',
-                        format='%.2f'
-                    ),
-                    'Days_Stock_Remaining': st.column_config.NumberColumn(
-                        'Days Stock Remaining',
-                        help='Days until stock runs out',
-                        format='%.1f'
-                    ),
-                    'Reorder_Quantity': st.column_config.NumberColumn(
-                        'Reorder Quantity',
-                        help='Recommended reorder quantity',
-                        format='%.0f'
-                    )
-                }
+                reorder_needed[['Product_Name', 'Current_Stock', 'Sales_Velocity', 
+                               'Days_Stock_Remaining', 'Reorder_Quantity']],
+                use_container_width=True
             )
         
-        with tab3:
-            st.header("Reorder Recommendations")
-            
-            # Filter for products that need reordering
-            reorder_needed = data[data['Reorder_Status'] == 'Reorder Now']
-            reorder_soon = data[data['Reorder_Status'] == 'Reorder Soon']
-            
-            if not reorder_needed.empty:
-                st.subheader("🚨 Immediate Reorder Required")
-                st.dataframe(
-                    reorder_needed[['Product_Name', 'Current_Stock', 'Sales_Velocity', 
-                                   'Days_Stock_Remaining', 'Reorder_Quantity']],
-                    use_container_width=True
-                )
-            
-            if not reorder_soon.empty:
-                st.subheader("⚠️ Reorder Soon")
-                st.dataframe(
-                    reorder_soon[['Product_Name', 'Current_Stock', 'Sales_Velocity', 
-                                 'Days_Stock_Remaining', 'Reorder_Quantity']],
-                    use_container_width=True
+        if not reorder_soon.empty:
+            st.subheader("⚠️ Reorder Soon")
+            st.dataframe(
+                reorder_soon[['Product_Name', 'Current_Stock', 'Sales_Velocity', 
+                             'Days_Stock_Remaining', 'Reorder_Quantity']],
+                use_container_width=True
+            )
+        
+        # Reorder summary chart
+        if not reorder_needed.empty or not reorder_soon.empty:
+            reorder_fig = create_reorder_chart(chart_inputs)
+            st.plotly_chart(reorder_fig, use_container_width=True)
+        
+        # Total reorder value
+        st.metric("Total Reorder Value", f"BHD {metrics['total_reorder_value']:,.2f}")
+    
+    with tab4:
+        st.header("Export Data")
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.subheader("Full Analysis")
+            # Serialized once per file and thresholds, not on every rerun
+            export_key = f"{data_key}:{slow_threshold}:{fast_threshold}"
+            csv_data, parquet_data = export_analysis(data, export_key)
+            st.download_button(
+                label="📥 Download Full Analysis (CSV)",
+                data=csv_data,
+                file_name="inventory_analysis.csv",
+                mime="text/csv",
+                on_click="ignore"
+            )
+            st.download_button(
+                label="📥 Download Full Analysis (Parquet)",
+                data=parquet_data,
+                file_name="inventory_analysis.parquet",
+                mime="application/vnd.apache.parquet",
+                on_click="ignore"
+            )
+        
+        with col2:
+            st.subheader("Reorder List")
+            reorder_data = data.iloc[result.reorder_any_idx]
+            if not reorder_data.empty:
+                reorder_csv, reorder_parquet = export_analysis(reorder_data, f"{export_key}:reorder")
+                st.download_button(
+                    label="📥 Download Reorder List (CSV)",
+                    data=reorder_csv,
+                    file_name="reorder_recommendations.csv",
+                    mime="text/csv",
+                    on_click="ignore"
                 )
-            
-            # Reorder summary chart
-            if not reorder_needed.empty or not reorder_soon.empty:
-                reorder_fig = create_reorder_chart(data)
-                st.plotly_chart(reorder_fig, use_container_width=True)
-            
-            # Total reorder value
-            total_reorder_value = (data['Reorder_Quantity'] * data['Unit_Cost']).sum()
-            st.metric("Total Reorder Value", f"BHD {total_reorder_value:,.2f}")
-        
-        with tab4:
-            st.header("Export Data")
-            
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                st.subheader("Full Analysis")
-                csv_data = export_to_csv(data)
                 st.download_button(
-                    label="📥 Download Full Analysis (CSV)",
-                    data=csv_data,
-                    file_name="inventory_analysis.csv",
-                    mime="text/csv"
+                    label="📥 Download Reorder List (Parquet)",
+                    data=reorder_parquet,
+                    file_name="reorder_recommendations.parquet",
+                    mime="application/vnd.apache.parquet",
+                    on_click="ignore"
                 )
-            
-            with col2:
-                st.subheader("Reorder List")
-                reorder_data = data[data['Reorder_Status'].isin(['Reorder Now', 'Reorder Soon'])]
-                if not reorder_data.empty:
-                    reorder_csv = export_to_csv(reorder_data)
-                    st.download_button(
-                        label="📥 Download Reorder List (CSV)",
-                        data=reorder_csv,
-                        file_name="reorder_recommendations.csv",
-                        mime="text/csv"
-                    )
-                else:
-                    st.info("No products require reordering at this time.")
-            
-            # Data sample preview
-            st.subheader("Data Preview")
-            st.dataframe(data.head(10), use_container_width=True)
+            else:
+                st.info("No products require reordering at this time.")
+        
+        # Data sample preview
+        st.subheader("Data Preview")
+        st.dataframe(data.head(10), use_container_width=True)
+
+def main():
+    st.title("📦 Inventory Management Dashboard")
+    st.markdown("Upload your inventory data to analyze sales velocity and get reorder recommendations")
+    
+    data = None
+    
+    # Sidebar for file upload
+    with st.sidebar:
+        st.header("Data Upload")
+        uploaded_file = st.file_uploader(
+            "Choose a CSV or Excel file",
+            type=['csv', 'xlsx', 'xls'],
+            help="Upload your inventory data with columns: Item no, Description, Inventory, Sales (Qty.), Average Cost, LDC"
+        )
+        
+        if uploaded_file is not None:
+            if validate_file_format(uploaded_file):
+                try:
+                    # Process uploaded file (parsing is cached on the content hash)
+                    file_bytes = uploaded_file.getvalue()
+                    upload = (hashlib.sha256(file_bytes).hexdigest(), uploaded_file.name)
+                    processor = DataProcessor()
+                    data = processor.load_data(upload[0], file_bytes, upload[1])
+                    
+                    if data is not None and not data.empty:
+                        st.session_state.upload = upload
+                        st.success(f"✅ Data loaded successfully! {len(data)} products found.")
+                    else:
+                        data = None
+                        st.error("❌ No data found in the uploaded file.")
+                        
+                except Exception as e:
+                    st.error(f"❌ Error processing file: {str(e)}")
+            else:
+                st.error("❌ Invalid file format. Please upload a CSV or Excel file.")
+        
+        elif st.session_state.upload is not None:
+            # Keep showing the last upload while it is still in the load cache
+            file_key, file_name = st.session_state.upload
+            try:
+                data = DataProcessor().load_data(file_key, None, file_name)
+            except LookupError:
+                st.session_state.upload = None
+                st.info(f"ℹ️ {file_name} is no longer loaded. Please upload it again.")
+    
+    # Main content area
+    if data is not None:
+        _analysis_view(data, st.session_state.upload[0])
     
     else:
         # Welcome screen
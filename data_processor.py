@@ -1,8 +1,14 @@
 import pandas as pd
+import numpy as np
 import streamlit as st
-from typing import Optional, Union
+from typing import Optional
 import io
 
+# Identifier and name columns are read as strings so that codes such as
+# '00123' keep their leading zeros; Arrow-backed so the string operations in
+# clean_data and the app run in Arrow compute kernels
+_READ_DTYPES = {'Item no': 'string[pyarrow]', 'Description': 'string[pyarrow]'}
+
 class DataProcessor:
     """
     Class for processing and validating uploaded inventory data
@@ -15,34 +21,23 @@ class DataProcessor:
         ]
         self.optional_columns = ['LDC', 'Sales (LCY)', 'Purch. (LCY)', 'Value']
         
-    def load_data(self, uploaded_file) -> Optional[pd.DataFrame]:
+    def load_data(self, file_key: str, file_bytes: Optional[bytes], file_name: str) -> Optional[pd.DataFrame]:
         """
-        Load data from uploaded file
+        Load data from uploaded file contents
         
         Args:
-            uploaded_file: Streamlit uploaded file object
+            file_key: Content hash of file_bytes, used as the cache key
+            file_bytes: Raw contents of the uploaded file, or None to load a
+                previous upload from the cache only
+            file_name: Name of the uploaded file, used to pick the reader
             
         Returns:
             DataFrame with processed data or None if error
-        """
-        try:
-            # Determine file type and read accordingly
-            if uploaded_file.name.endswith('.csv'):
-                data = pd.read_csv(uploaded_file)
-            elif uploaded_file.name.endswith(('.xlsx', '.xls')):
-                data = pd.read_excel(uploaded_file)
-            else:
-                st.error("Unsupported file format. Please upload CSV or Excel files.")
-                return None
-            
-            # Validate and clean data
-            processed_data = self.validate_and_clean_data(data)
-            
-            return processed_data
             
-        except Exception as e:
-            st.error(f"Error loading file: {str(e)}")
-            return None
+        Raises:
+            LookupError: file_bytes is None and the upload is no longer cached
+        """
+        return _load_df(file_key, file_name, file_bytes)
     
     def validate_and_clean_data(self, data: pd.DataFrame) -> Optional[pd.DataFrame]:
         """
@@ -90,22 +85,25 @@ class DataProcessor:
         """
         suggestions = []
         
+        # Keyed by the required column names reported as missing
         column_mappings = {
-            'Product_ID': ['item no', 'product_id', 'sku', 'item_id', 'product_code'],
-            'Product_Name': ['description', 'product_name', 'item_name', 'product'],
-            'Current_Stock': ['inventory', 'stock', 'quantity', 'qty', 'on_hand', 'current_qty'],
-            'Sales_Last_30_Days': ['sales (qty.)', 'sales', 'sold', 'units_sold', 'monthly_sales', 'last_30_days'],
-            'Unit_Cost': ['average cost', 'cost', 'price', 'unit_price', 'unit_cost', 'cost_per_unit']
+            'Item no': ['item no', 'product_id', 'sku', 'item_id', 'product_code'],
+            'Description': ['description', 'product_name', 'item_name', 'product'],
+            'Inventory': ['inventory', 'stock', 'quantity', 'qty', 'on_hand', 'current_qty'],
+            'Sales (Qty.)': ['sales (qty.)', 'sales', 'sold', 'units_sold', 'monthly_sales', 'last_30_days'],
+            'Average Cost': ['average cost', 'cost', 'price', 'unit_price', 'unit_cost', 'cost_per_unit']
         }
         
+        # Lowercase each available column name once
+        available_lower = {col: str(col).lower() for col in available_columns}
+        
         for missing_col in missing_columns:
             if missing_col in column_mappings:
-                possible_matches = []
-                for available_col in available_columns:
-                    for suggestion in column_mappings[missing_col]:
-                        if suggestion.lower() in available_col.lower():
-                            possible_matches.append(available_col)
-                            break
+                candidates = column_mappings[missing_col]
+                possible_matches = [
+                    col for col, lowered in available_lower.items()
+                    if any(suggestion in lowered for suggestion in candidates)
+                ]
                 
                 if possible_matches:
                     suggestions.append(f"'{missing_col}' → {possible_matches}")
@@ -116,8 +114,6 @@ class DataProcessor:
         """
         Map your specific columns to standard format for analysis
         """
-        mapped_data = data.copy()
-        
         # Column mapping from your format to standard format
         column_mapping = {
             'Item no': 'Product_ID',
@@ -132,7 +128,7 @@ class DataProcessor:
         }
         
         # Rename columns
-        mapped_data = mapped_data.rename(columns=column_mapping)
+        mapped_data = data.rename(columns=column_mapping)
         
         # Add any missing standard columns with default values
         if 'Lead_Time_Days' not in mapped_data.columns:
@@ -144,14 +140,19 @@ class DataProcessor:
         """
         Clean and standardize the data
         """
-        cleaned_data = data.copy()
+        # Columns are replaced on a shallow copy; row drops are collected in
+        # a single mask and applied once at the end
+        cleaned_data = data.copy(deep=False)
         
-        # Remove duplicates based on Product_ID
-        initial_count = len(cleaned_data)
-        cleaned_data = cleaned_data.drop_duplicates(subset=['Product_ID'])
+        # Remove duplicates based on Product_ID: factorize to integer codes and
+        # keep the first row of each code
+        codes, _ = pd.factorize(cleaned_data['Product_ID'])
+        keep = np.zeros(len(codes), dtype=bool)
+        keep[np.unique(codes, return_index=True)[1]] = True
+        duplicate_count = len(keep) - keep.sum()
         
-        if len(cleaned_data) < initial_count:
-            st.warning(f"Removed {initial_count - len(cleaned_data)} duplicate products")
+        if duplicate_count > 0:
+            st.warning(f"Removed {duplicate_count} duplicate products")
         
         # Clean numerical columns
         numerical_columns = ['Current_Stock', 'Sales_Last_30_Days', 'Unit_Cost']
@@ -172,29 +173,35 @@ class DataProcessor:
             cleaned_data['Lead_Time_Days'] = pd.to_numeric(
                 cleaned_data['Lead_Time_Days'], errors='coerce'
             )
-            cleaned_data['Lead_Time_Days'] = cleaned_data['Lead_Time_Days'].clip(lower=1)
+            # Small whole-day values: float32 holds them exactly (and keeps NaN)
+            cleaned_data['Lead_Time_Days'] = (
+                cleaned_data['Lead_Time_Days'].clip(lower=1).astype(np.float32)
+            )
         
         # Clean text columns
         text_columns = ['Product_Name']
         for col in text_columns:
             if col in cleaned_data.columns:
-                cleaned_data[col] = cleaned_data[col].astype(str).str.strip()
+                cleaned_data[col] = cleaned_data[col].astype('string[pyarrow]').str.strip()
         
         # Remove rows with missing critical data
         critical_columns = ['Product_Name', 'Unit_Cost']
         for col in critical_columns:
             if col == 'Product_Name':
-                mask = cleaned_data[col].isna() | (cleaned_data[col].astype(str).str.strip() == '')
+                mask = cleaned_data[col].fillna('') == ''
             else:
                 mask = cleaned_data[col].isna() | (cleaned_data[col] == 0)
+            mask = mask.to_numpy(dtype=bool) & keep
             
             removed_count = mask.sum()
             if removed_count > 0:
                 st.warning(f"Removed {removed_count} products with missing {col}")
-                cleaned_data = cleaned_data[~mask]
+                keep &= ~mask
         
-        # Ensure Product_ID is string
-        cleaned_data['Product_ID'] = cleaned_data['Product_ID'].astype(str)
+        cleaned_data = cleaned_data.loc[keep].reset_index(drop=True)
+        
+        # Ensure Product_ID is an Arrow-backed string
+        cleaned_data['Product_ID'] = cleaned_data['Product_ID'].astype('string[pyarrow]')
         
         # Final validation
         if cleaned_data.empty:
@@ -225,3 +232,36 @@ class DataProcessor:
         }
         
         return summary
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def _load_df(file_key: str, name: str, _file_bytes: Optional[bytes]) -> Optional[pd.DataFrame]:
+    """
+    Read and clean an uploaded file, cached on its content key so that
+    Streamlit reruns skip parsing (and re-hashing the bytes) for unchanged uploads
+    """
+    if _file_bytes is None:
+        # Raised, not returned, so the miss is not cached
+        raise LookupError(f"{name} is no longer in the load cache")
+    
+    try:
+        # Determine file type and read accordingly
+        if name.lower().endswith('.csv'):
+            try:
+                data = pd.read_csv(io.BytesIO(_file_bytes), engine='pyarrow', dtype=_READ_DTYPES)
+            except pd.errors.ParserError:
+                # The Arrow reader rejects ragged rows; the C engine pads them with NaN
+                data = pd.read_csv(io.BytesIO(_file_bytes), dtype=_READ_DTYPES)
+        elif name.lower().endswith(('.xlsx', '.xls')):
+            data = pd.read_excel(io.BytesIO(_file_bytes), engine='calamine', dtype=_READ_DTYPES)
+        else:
+            st.error("Unsupported file format. Please upload CSV or Excel files.")
+            return None
+        
+        # Validate and clean data
+        processed_data = DataProcessor().validate_and_clean_data(data)
+        
+        return processed_data
+        
+    except Exception as e:
+        st.error(f"Error loading file: {str(e)}")
+        return None
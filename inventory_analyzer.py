@@ -1,6 +1,31 @@
 import pandas as pd
 import numpy as np
-from typing import Dict, Tuple
+import streamlit as st
+from typing import Dict, NamedTuple, Tuple
+
+try:
+    from numba import njit
+except ImportError:  # Numba is optional; the analysis falls back to NumPy
+    njit = None
+
+# Below this many rows the NumPy path beats Numba's dispatch and thread overhead
+_JIT_MIN_ROWS = 100_000
+
+# Fixed label sets for the categorical result columns
+CATEGORY_LABELS = ['Slow Moving', 'Fast Moving', 'Best Selling']
+STOCK_STATUS_LABELS = ['Critical', 'Low', 'Normal', 'High']
+REORDER_STATUS_LABELS = ['Reorder Now', 'Reorder Soon', 'No Action Needed']
+
+class AnalysisResult(NamedTuple):
+    """
+    Analyzed inventory data together with its precomputed dashboard metrics
+    and the row positions of products that need reordering
+    """
+    data: pd.DataFrame
+    metrics: Dict
+    reorder_now_idx: np.ndarray
+    reorder_soon_idx: np.ndarray
+    reorder_any_idx: np.ndarray
 
 class InventoryAnalyzer:
     """
@@ -16,138 +41,32 @@ class InventoryAnalyzer:
             slow_threshold: Units per day threshold for slow-moving items
             fast_threshold: Units per day threshold for fast-moving items
         """
-        self.data = data.copy()
+        # Shallow copy: column data is shared with the caller, but columns
+        # added or replaced here never leak back into the caller's frame
+        self.data = data.copy(deep=False)
         self.slow_threshold = slow_threshold
         self.fast_threshold = fast_threshold
         
-    def calculate_sales_velocity(self) -> pd.DataFrame:
-        """
-        Calculate sales velocity (units per day) for each product
-        """
-        # Calculate daily sales velocity
-        self.data['Sales_Velocity'] = self.data['Sales_Last_30_Days'] / 30
-        
-        # Handle zero or negative sales
-        self.data['Sales_Velocity'] = self.data['Sales_Velocity'].clip(lower=0)
-        
-        return self.data
-    
-    def categorize_products(self) -> pd.DataFrame:
+    def analyze_base(self) -> pd.DataFrame:
         """
-        Categorize products based on sales velocity
+        Compute every analysis column that does not depend on the velocity
+        thresholds, i.e. everything except Category
         """
-        self.calculate_sales_velocity()
-        
-        def categorize_product(velocity):
-            if velocity >= self.fast_threshold:
-                return 'Best Selling'
-            elif velocity >= self.slow_threshold:
-                return 'Fast Moving'
-            else:
-                return 'Slow Moving'
-        
-        self.data['Category'] = self.data['Sales_Velocity'].apply(categorize_product)
+        # Lead time defaults to 2 weeks when missing
+        if 'Lead_Time_Days' in self.data.columns:
+            lead_time = self.data['Lead_Time_Days'].fillna(14)
+        else:
+            lead_time = pd.Series(14, index=self.data.index)
         
-        return self.data
-    
-    def calculate_stock_metrics(self) -> pd.DataFrame:
-        """
-        Calculate various stock-related metrics
-        """
-        # Days of stock remaining
-        self.data['Days_Stock_Remaining'] = np.where(
-            self.data['Sales_Velocity'] > 0,
-            self.data['Current_Stock'] / self.data['Sales_Velocity'],
-            999  # Set high value for products with no sales
+        # Compute every derived column in a single pass over the raw arrays
+        columns = _analyze_arrays(
+            self.data['Current_Stock'].to_numpy(dtype=np.float64),
+            self.data['Sales_Last_30_Days'].to_numpy(dtype=np.float64),
+            self.data['Unit_Cost'].to_numpy(dtype=np.float64),
+            lead_time.to_numpy(dtype=np.float64)
         )
         
-        # Stock status
-        def get_stock_status(days_remaining):
-            if days_remaining <= 7:
-                return 'Critical'
-            elif days_remaining <= 14:
-                return 'Low'
-            elif days_remaining <= 30:
-                return 'Normal'
-            else:
-                return 'High'
-        
-        self.data['Stock_Status'] = self.data['Days_Stock_Remaining'].apply(get_stock_status)
-        
-        return self.data
-    
-    def calculate_reorder_recommendations(self) -> pd.DataFrame:
-        """
-        Calculate reorder quantities and timing recommendations
-        """
-        # Set default lead time if not provided
-        if 'Lead_Time_Days' not in self.data.columns:
-            self.data['Lead_Time_Days'] = 14  # Default 2 weeks
-        
-        # Fill missing lead times
-        self.data['Lead_Time_Days'] = self.data['Lead_Time_Days'].fillna(14)
-        
-        # Calculate reorder point (lead time demand + safety stock)
-        safety_stock_days = 7  # 1 week safety stock
-        self.data['Reorder_Point'] = self.data['Sales_Velocity'] * (
-            self.data['Lead_Time_Days'] + safety_stock_days
-        )
-        
-        # Calculate economic order quantity (simplified)
-        # Using a simple formula: 30 days of demand
-        self.data['Reorder_Quantity'] = np.where(
-            self.data['Sales_Velocity'] > 0,
-            np.ceil(self.data['Sales_Velocity'] * 30),  # 30 days supply
-            0
-        )
-        
-        # Adjust for current stock levels
-        self.data['Reorder_Quantity'] = np.maximum(
-            0,
-            self.data['Reorder_Point'] - self.data['Current_Stock'] + self.data['Reorder_Quantity']
-        )
-        
-        # Determine reorder status
-        def get_reorder_status(current_stock, reorder_point, days_remaining):
-            if current_stock <= reorder_point:
-                return 'Reorder Now'
-            elif days_remaining <= 14:
-                return 'Reorder Soon'
-            else:
-                return 'No Action Needed'
-        
-        self.data['Reorder_Status'] = self.data.apply(
-            lambda row: get_reorder_status(
-                row['Current_Stock'], 
-                row['Reorder_Point'], 
-                row['Days_Stock_Remaining']
-            ), 
-            axis=1
-        )
-        
-        return self.data
-    
-    def calculate_financial_metrics(self) -> pd.DataFrame:
-        """
-        Calculate financial metrics for inventory
-        """
-        # Current inventory value
-        self.data['Inventory_Value'] = self.data['Current_Stock'] * self.data['Unit_Cost']
-        
-        # Reorder value
-        self.data['Reorder_Value'] = self.data['Reorder_Quantity'] * self.data['Unit_Cost']
-        
-        # Monthly sales value (estimated)
-        self.data['Monthly_Sales_Value'] = (
-            self.data['Sales_Last_30_Days'] * self.data['Unit_Cost']
-        )
-        
-        # Inventory turnover ratio (annual estimate)
-        self.data['Turnover_Ratio'] = np.where(
-            self.data['Inventory_Value'] > 0,
-            (self.data['Monthly_Sales_Value'] * 12) / self.data['Inventory_Value'],
-            0
-        )
+        self.data = self.data.assign(Lead_Time_Days=lead_time, **columns)
         
         return self.data
     
@@ -155,22 +74,7 @@ class InventoryAnalyzer:
         """
         Perform complete inventory analysis
         """
-        # Run all analysis steps
-        self.categorize_products()
-        self.calculate_stock_metrics()
-        self.calculate_reorder_recommendations()
-        self.calculate_financial_metrics()
-        
-        # Round numerical columns for better display
-        numerical_columns = [
-            'Sales_Velocity', 'Days_Stock_Remaining', 'Reorder_Point',
-            'Reorder_Quantity', 'Inventory_Value', 'Reorder_Value',
-            'Monthly_Sales_Value', 'Turnover_Ratio'
-        ]
-        
-        for col in numerical_columns:
-            if col in self.data.columns:
-                self.data[col] = self.data[col].round(2)
+        self.data = _apply_categories(self.analyze_base(), self.slow_threshold, self.fast_threshold)
         
         return self.data
     
@@ -181,16 +85,184 @@ class InventoryAnalyzer:
         if self.data.empty:
             return {}
         
+        # Counted on the categorical codes; unused labels are dropped
+        category_counts = self.data['Category'].value_counts()
+        reorder_counts = self.data['Reorder_Status'].value_counts()
+        
         stats = {
             'total_products': len(self.data),
             'total_inventory_value': self.data['Inventory_Value'].sum(),
             'total_reorder_value': self.data['Reorder_Value'].sum(),
-            'category_breakdown': self.data['Category'].value_counts().to_dict(),
-            'reorder_status_breakdown': self.data['Reorder_Status'].value_counts().to_dict(),
+            'category_breakdown': category_counts[category_counts > 0].to_dict(),
+            'reorder_status_breakdown': reorder_counts[reorder_counts > 0].to_dict(),
             'average_turnover_ratio': self.data['Turnover_Ratio'].mean(),
-            'products_needing_reorder': len(
-                self.data[self.data['Reorder_Status'].isin(['Reorder Now', 'Reorder Soon'])]
+            'products_needing_reorder': int(
+                reorder_counts.get('Reorder Now', 0) + reorder_counts.get('Reorder Soon', 0)
             )
         }
         
         return stats
+    
+    def get_dashboard_metrics(self) -> Dict:
+        """
+        Get the headline totals shown in the dashboard metrics bar
+        """
+        total_sales = self.data['Monthly_Sales_Value'].sum()
+        total_reorder_value = (self.data['Reorder_Quantity'] * self.data['Unit_Cost']).sum()
+        
+        metrics = {
+            'total_value': self.data['Inventory_Value'].sum(),
+            'total_sales': total_sales,
+            'sale_qty': self.data['Sales_Last_30_Days'].sum(),
+            # Use actual Sales LCY if available, otherwise fallback to Monthly Sales Value
+            'sale_lcy': (
+                self.data['Sales_LCY'].sum() if 'Sales_LCY' in self.data.columns else total_sales
+            ),
+            # Use actual Purchase LCY if available, otherwise calculate from reorder quantities
+            'purchase_lcy': (
+                self.data['Purchase_LCY'].sum() if 'Purchase_LCY' in self.data.columns
+                else total_reorder_value
+            ),
+            'total_reorder_value': total_reorder_value
+        }
+        
+        return metrics
+
+def _analysis_kernel(stock: np.ndarray, sales: np.ndarray, unit_cost: np.ndarray,
+                     lead_time: np.ndarray) -> Tuple[np.ndarray, ...]:
+    """
+    Element-wise analysis rules written as plain array expressions, so the
+    same code runs under NumPy or, for large frames, compiled by Numba
+    """
+    # Sales velocity (units per day)
+    velocity = np.maximum(sales / 30, 0.0)
+    has_sales = velocity > 0
+    
+    # Days of stock remaining, with a high value for products with no sales
+    days_remaining = np.where(has_sales, stock / velocity, 999.0)
+    
+    # Reorder point (lead time demand + 1 week safety stock) and quantity
+    # (30 days of demand, adjusted for current stock)
+    reorder_point = velocity * (lead_time + 7)
+    reorder_quantity = np.where(has_sales, np.ceil(velocity * 30), 0.0)
+    reorder_quantity = np.maximum(0.0, reorder_point - stock + reorder_quantity)
+    
+    # Financial metrics
+    inventory_value = stock * unit_cost
+    reorder_value = reorder_quantity * unit_cost
+    monthly_sales_value = sales * unit_cost
+    turnover_ratio = np.where(inventory_value > 0, (monthly_sales_value * 12) / inventory_value, 0.0)
+    
+    # Label codes, indexing STOCK_STATUS_LABELS and REORDER_STATUS_LABELS
+    stock_status = np.where(
+        days_remaining <= 7, 0,
+        np.where(days_remaining <= 14, 1, np.where(days_remaining <= 30, 2, 3))
+    )
+    reorder_status = np.where(stock <= reorder_point, 0, np.where(days_remaining <= 14, 1, 2))
+    
+    return (velocity, days_remaining, stock_status, reorder_point, reorder_quantity,
+            reorder_status, inventory_value, reorder_value, monthly_sales_value, turnover_ratio)
+
+if njit is not None:
+    # parallel=True fuses the array expressions into one multi-threaded loop.
+    # fastmath is left off: reciprocal approximations would change
+    # ceil(velocity * 30) and the status comparisons for some rows.
+    _jit_analysis_kernel = njit(parallel=True, cache=True)(_analysis_kernel)
+
+def _analyze_arrays(stock: np.ndarray, sales: np.ndarray, unit_cost: np.ndarray,
+                    lead_time: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Fused analysis: derives all analysis columns from the input arrays
+    without building intermediate Series. Numerical outputs are rounded to
+    two decimals for display; labels are computed from the unrounded values.
+    """
+    if njit is not None and len(stock) >= _JIT_MIN_ROWS:
+        results = _jit_analysis_kernel(stock, sales, unit_cost, lead_time)
+    else:
+        # np.where evaluates both branches; the masked-out divisions are discarded
+        with np.errstate(divide='ignore', invalid='ignore'):
+            results = _analysis_kernel(stock, sales, unit_cost, lead_time)
+    
+    (velocity, days_remaining, stock_status, reorder_point, reorder_quantity,
+     reorder_status, inventory_value, reorder_value, monthly_sales_value, turnover_ratio) = results
+    
+    return {
+        'Sales_Velocity': velocity.round(2),
+        'Days_Stock_Remaining': days_remaining.round(2),
+        'Stock_Status': pd.Categorical.from_codes(stock_status, categories=STOCK_STATUS_LABELS),
+        'Reorder_Point': reorder_point.round(2),
+        'Reorder_Quantity': reorder_quantity.round(2),
+        'Reorder_Status': pd.Categorical.from_codes(reorder_status, categories=REORDER_STATUS_LABELS),
+        'Inventory_Value': inventory_value.round(2),
+        'Reorder_Value': reorder_value.round(2),
+        'Monthly_Sales_Value': monthly_sales_value.round(2),
+        'Turnover_Ratio': turnover_ratio.round(2)
+    }
+
+def _apply_categories(data: pd.DataFrame, slow_threshold: float,
+                      fast_threshold: float) -> pd.DataFrame:
+    """
+    Add the threshold-dependent Category column to a base analysis frame.
+    Velocity is recomputed from the raw sales so the labels use unrounded
+    values, exactly as the other labels do.
+    """
+    velocity = np.maximum(data['Sales_Last_30_Days'].to_numpy(dtype=np.float64) / 30, 0.0)
+    category = np.where(velocity >= fast_threshold, 2, np.where(velocity >= slow_threshold, 1, 0))
+    
+    # Shallow copy so the cached base frame is never modified
+    categorized = data.copy(deep=False)
+    categorized.insert(
+        categorized.columns.get_loc('Sales_Velocity') + 1,
+        'Category',
+        pd.Categorical.from_codes(category, categories=CATEGORY_LABELS)
+    )
+    
+    return categorized
+
+@st.cache_resource(max_entries=8, show_spinner=False)
+def run_base_analysis(_data: pd.DataFrame, data_key: str) -> AnalysisResult:
+    """
+    Run the threshold-independent part of the analysis, cached on the data
+    key only. The frame itself is not hashed, so callers must pass a key
+    that changes with it. The result is a shared resource: every session
+    with the same key gets the same object, which must not be modified.
+    
+    Args:
+        _data: Cleaned inventory DataFrame
+        data_key: Content key identifying _data (e.g. the uploaded file hash)
+        
+    Returns:
+        AnalysisResult with the base DataFrame (no Category column), dashboard
+        metrics and positional (iloc) indices of the reorder rows
+    """
+    analyzer = InventoryAnalyzer(_data)
+    base_data = analyzer.analyze_base()
+    
+    # Reorder_Status codes index REORDER_STATUS_LABELS
+    status_codes = base_data['Reorder_Status'].cat.codes.to_numpy()
+    reorder_now_idx = np.flatnonzero(status_codes == REORDER_STATUS_LABELS.index('Reorder Now'))
+    reorder_soon_idx = np.flatnonzero(status_codes == REORDER_STATUS_LABELS.index('Reorder Soon'))
+    reorder_any_idx = np.flatnonzero(status_codes != REORDER_STATUS_LABELS.index('No Action Needed'))
+    
+    return AnalysisResult(base_data, analyzer.get_dashboard_metrics(),
+                          reorder_now_idx, reorder_soon_idx, reorder_any_idx)
+
+def run_inventory_analysis(data: pd.DataFrame, data_key: str, slow_threshold: float,
+                           fast_threshold: float) -> AnalysisResult:
+    """
+    Run the full analysis. The base analysis is cached on the data key, so
+    a threshold change only recomputes the Category column.
+    
+    Args:
+        data: Cleaned inventory DataFrame
+        data_key: Content key identifying data (e.g. the uploaded file hash)
+        slow_threshold: Units per day threshold for slow-moving items
+        fast_threshold: Units per day threshold for fast-moving items
+        
+    Returns:
+        AnalysisResult with the analyzed DataFrame, dashboard metrics and
+        positional (iloc) indices of the reorder rows
+    """
+    base = run_base_analysis(data, data_key)
+    
+    return base._replace(data=_apply_categories(base.data, slow_threshold, fast_threshold))
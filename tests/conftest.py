@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+
+@pytest.fixture
+def inventory() -> pd.DataFrame:
+    """
+    Cleaned inventory frame covering the rule boundaries: zero sales,
+    velocities exactly on the default thresholds, missing lead times and
+    stock exactly at the reorder point
+    """
+    rng = np.random.default_rng(7)
+    n = 240
+
+    sales = rng.integers(0, 400, n).astype(np.float64)
+    sales[:6] = [0, 30, 150, 29, 151, 0]  # velocity 0, 1.0, 5.0 and just off them
+    stock = rng.integers(0, 600, n).astype(np.float64)
+    stock[6] = 21.0  # velocity 1.0 * (14 + 7): exactly the reorder point
+    sales[6] = 30
+    lead_time = rng.integers(1, 45, n).astype(np.float64)
+    lead_time[6] = 14
+    lead_time[::17] = np.nan
+
+    return pd.DataFrame({
+        'Product_ID': [f"SKU{i:05d}" for i in range(n)],
+        'Product_Name': [f"Product {i}" for i in range(n)],
+        'Current_Stock': stock,
+        'Sales_Last_30_Days': sales,
+        'Unit_Cost': np.round(rng.random(n) * 50 + 0.5, 3),
+        'Lead_Time_Days': lead_time
+    })
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_processor import DataProcessor
+
+
+def test_clean_data_keeps_first_row_per_product(inventory):
+    # Interleave duplicates with different values so the kept row is visible
+    duplicates = inventory.iloc[[5, 2, 9, 2]].assign(Current_Stock=-1.0)
+    data = pd.concat([inventory.iloc[:10], duplicates, inventory.iloc[10:]], ignore_index=True)
+
+    cleaned = DataProcessor().clean_data(data)
+    expected = data.drop_duplicates(subset=['Product_ID'])
+
+    np.testing.assert_array_equal(cleaned['Product_ID'].to_numpy(dtype=object), expected['Product_ID'].to_numpy(dtype=object))
+    np.testing.assert_array_equal(cleaned['Current_Stock'].to_numpy(), expected['Current_Stock'].to_numpy())
+
+
+def test_clean_data_drops_rows_missing_name_or_cost(inventory):
+    data = inventory.copy()
+    data['Product_Name'] = data['Product_Name'].astype(object)
+    data.loc[3, 'Product_Name'] = '   '
+    data.loc[4, 'Product_Name'] = None
+    data.loc[7, 'Unit_Cost'] = 0
+    data.loc[8, 'Unit_Cost'] = np.nan
+
+    cleaned = DataProcessor().clean_data(data)
+
+    assert len(cleaned) == len(data) - 4
+    assert not cleaned['Product_ID'].isin(['SKU00003', 'SKU00004', 'SKU00007', 'SKU00008']).any()
+
+
+def test_load_data_accepts_upper_case_extension():
+    file_bytes = (
+        b"Item no,Description,Inventory,Sales (Qty.),Average Cost\n"
+        b"A1,Widget,10,30,2.5\n"
+        b"A2,Gadget,0,3,1.25\n"
+    )
+
+    data = DataProcessor().load_data('test_upper_case_extension', file_bytes, 'INVENTORY.CSV')
+
+    assert data is not None
+    assert list(data['Product_ID']) == ['A1', 'A2']
+
+
+def test_load_data_without_bytes_uses_only_the_cache():
+    file_bytes = b"Item no,Description,Inventory,Sales (Qty.),Average Cost\nA1,Widget,10,30,2.5\n"
+    processor = DataProcessor()
+
+    with pytest.raises(LookupError):
+        processor.load_data('test_cache_only', None, 'inventory.csv')
+
+    loaded = processor.load_data('test_cache_only', file_bytes, 'inventory.csv')
+    pd.testing.assert_frame_equal(processor.load_data('test_cache_only', None, 'inventory.csv'), loaded)
@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import inventory_analyzer
+from inventory_analyzer import InventoryAnalyzer, run_inventory_analysis
+
+ANALYSIS_COLUMNS = [
+    'Sales_Velocity', 'Category', 'Days_Stock_Remaining', 'Stock_Status',
+    'Reorder_Point', 'Reorder_Quantity', 'Reorder_Status', 'Inventory_Value',
+    'Reorder_Value', 'Monthly_Sales_Value', 'Turnover_Ratio'
+]
+
+
+def baseline_analysis(data: pd.DataFrame, slow_threshold: float, fast_threshold: float) -> pd.DataFrame:
+    """
+    The original step-by-step analysis, kept as the reference the fused
+    kernel must reproduce
+    """
+    data = data.copy()
+
+    data['Sales_Velocity'] = (data['Sales_Last_30_Days'] / 30).clip(lower=0)
+    data['Category'] = data['Sales_Velocity'].apply(
+        lambda v: 'Best Selling' if v >= fast_threshold
+        else 'Fast Moving' if v >= slow_threshold else 'Slow Moving'
+    )
+
+    data['Days_Stock_Remaining'] = np.where(
+        data['Sales_Velocity'] > 0, data['Current_Stock'] / data['Sales_Velocity'], 999
+    )
+    data['Stock_Status'] = data['Days_Stock_Remaining'].apply(
+        lambda d: 'Critical' if d <= 7 else 'Low' if d <= 14 else 'Normal' if d <= 30 else 'High'
+    )
+
+    data['Lead_Time_Days'] = data['Lead_Time_Days'].fillna(14)
+    data['Reorder_Point'] = data['Sales_Velocity'] * (data['Lead_Time_Days'] + 7)
+    data['Reorder_Quantity'] = np.where(
+        data['Sales_Velocity'] > 0, np.ceil(data['Sales_Velocity'] * 30), 0
+    )
+    data['Reorder_Quantity'] = np.maximum(
+        0, data['Reorder_Point'] - data['Current_Stock'] + data['Reorder_Quantity']
+    )
+    data['Reorder_Status'] = data.apply(
+        lambda row: 'Reorder Now' if row['Current_Stock'] <= row['Reorder_Point']
+        else 'Reorder Soon' if row['Days_Stock_Remaining'] <= 14 else 'No Action Needed',
+        axis=1
+    )
+
+    data['Inventory_Value'] = data['Current_Stock'] * data['Unit_Cost']
+    data['Reorder_Value'] = data['Reorder_Quantity'] * data['Unit_Cost']
+    data['Monthly_Sales_Value'] = data['Sales_Last_30_Days'] * data['Unit_Cost']
+    data['Turnover_Ratio'] = np.where(
+        data['Inventory_Value'] > 0,
+        (data['Monthly_Sales_Value'] * 12) / data['Inventory_Value'],
+        0
+    )
+
+    for col in ['Sales_Velocity', 'Days_Stock_Remaining', 'Reorder_Point', 'Reorder_Quantity',
+                'Inventory_Value', 'Reorder_Value', 'Monthly_Sales_Value', 'Turnover_Ratio']:
+        data[col] = data[col].round(2)
+
+    return data
+
+
+@pytest.fixture(params=['numpy', 'jit'])
+def kernel_path(request, monkeypatch):
+    """
+    Run the analysis through the NumPy kernel, or through the Numba kernel
+    by lowering the row threshold below the fixture size
+    """
+    if request.param == 'jit':
+        if inventory_analyzer.njit is None:
+            pytest.skip("numba is not installed")
+        monkeypatch.setattr(inventory_analyzer, '_JIT_MIN_ROWS', 0)
+    else:
+        monkeypatch.setattr(inventory_analyzer, '_JIT_MIN_ROWS', np.iinfo(np.int64).max)
+    return request.param
+
+
+@pytest.mark.parametrize('thresholds', [(1.0, 5.0), (0.5, 2.5), (3.0, 3.0)])
+def test_analysis_matches_baseline(inventory, kernel_path, thresholds):
+    result = InventoryAnalyzer(inventory, *thresholds).analyze_inventory()
+    expected = baseline_analysis(inventory, *thresholds)
+
+    assert list(result.columns) == list(expected.columns)
+    for col in ANALYSIS_COLUMNS + ['Lead_Time_Days']:
+        if isinstance(result[col].dtype, pd.CategoricalDtype):
+            np.testing.assert_array_equal(result[col].astype(str).to_numpy(), expected[col].to_numpy(), err_msg=col)
+        else:
+            np.testing.assert_array_equal(
+                result[col].to_numpy(dtype=np.float64), expected[col].to_numpy(dtype=np.float64), err_msg=col
+            )
+
+
+def test_jit_kernel_is_bit_identical_to_numpy(inventory):
+    if inventory_analyzer.njit is None:
+        pytest.skip("numba is not installed")
+
+    arrays = [
+        inventory[col].to_numpy(dtype=np.float64)
+        for col in ['Current_Stock', 'Sales_Last_30_Days', 'Unit_Cost']
+    ] + [inventory['Lead_Time_Days'].fillna(14).to_numpy(dtype=np.float64)]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        numpy_results = inventory_analyzer._analysis_kernel(*arrays)
+    jit_results = inventory_analyzer._jit_analysis_kernel(*arrays)
+
+    for numpy_result, jit_result in zip(numpy_results, jit_results):
+        np.testing.assert_array_equal(numpy_result, jit_result)
+
+
+def test_reorder_indices_match_status(inventory):
+    result = run_inventory_analysis(inventory, 'test_reorder_indices', 1.0, 5.0)
+    status = result.data['Reorder_Status'].astype(str).to_numpy()
+
+    np.testing.assert_array_equal(result.reorder_now_idx, np.flatnonzero(status == 'Reorder Now'))
+    np.testing.assert_array_equal(result.reorder_soon_idx, np.flatnonzero(status == 'Reorder Soon'))
+    np.testing.assert_array_equal(result.reorder_any_idx, np.flatnonzero(status != 'No Action Needed'))
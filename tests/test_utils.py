@@ -0,0 +1,61 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import utils
+
+from inventory_analyzer import InventoryAnalyzer
+from utils import calculate_safety_stock, calculate_safety_stock_batch, export_analysis, export_to_csv
+
+
+def test_export_to_csv_reads_back_like_to_csv(inventory):
+    data = InventoryAnalyzer(inventory).analyze_inventory()
+    data['Product_Name'] = data['Product_Name'].astype('string[pyarrow]')
+    data.loc[0, 'Product_Name'] = 'Widget, "large"'
+    data.loc[1, 'Product_Name'] = pd.NA
+    assert isinstance(data['Category'].dtype, pd.CategoricalDtype)
+
+    arrow_csv = export_to_csv(data)
+    pandas_csv = data.to_csv(index=False).encode()
+
+    # Header and strings are quoted, and whole floats lose their .0, so
+    # only the parsed values match, not the text or the inferred dtypes
+    assert arrow_csv.startswith(b'"Product_ID","Product_Name",')
+    pd.testing.assert_frame_equal(
+        pd.read_csv(io.BytesIO(arrow_csv)),
+        pd.read_csv(io.BytesIO(pandas_csv)),
+        check_dtype=False
+    )
+
+
+def test_export_analysis_serializes_once_per_key(inventory, monkeypatch):
+    calls = []
+    monkeypatch.setattr(utils, 'export_to_parquet', lambda data: calls.append(len(data)) or b'')
+    export_analysis.clear()
+
+    first = export_analysis(inventory, 'test_export_key')
+    assert export_analysis(inventory, 'test_export_key') is first
+    export_analysis(inventory.head(10), 'test_export_key:reorder')
+
+    assert calls == [len(inventory), 10]
+
+
+@pytest.mark.parametrize('service_level', [0.9, 0.95, 0.975])
+def test_safety_stock_uses_the_fixed_95_percent_z_score(service_level):
+    # 1.65 * (10 * 0.3) * sqrt(9), whatever service level is passed
+    assert calculate_safety_stock(10, 9, service_level) == pytest.approx(14.85)
+    assert calculate_safety_stock(-2, 9, service_level) == 0
+
+
+def test_safety_stock_batch_matches_scalar():
+    rng = np.random.default_rng(5)
+    sales_velocity = np.concatenate([[0.0, -1.5, np.nan, 2.0], rng.random(2000) * 40])
+    lead_time = np.concatenate([[14.0, 14.0, 14.0, 0.0], rng.integers(1, 60, 2000).astype(np.float64)])
+
+    batch = calculate_safety_stock_batch(sales_velocity, lead_time)
+    scalar = np.array([calculate_safety_stock(v, t) for v, t in zip(sales_velocity, lead_time)], dtype=np.float64)
+
+    # np.sqrt and Python's ** 0.5 can differ in the last bit
+    np.testing.assert_array_max_ulp(batch, scalar, maxulp=2)
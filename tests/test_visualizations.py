@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+
+from inventory_analyzer import InventoryAnalyzer
+from visualizations import (
+    _reorder_top_rows, _top_k_positions, build_chart_inputs, create_abc_analysis_chart,
+    create_days_remaining_histogram
+)
+
+
+def test_days_remaining_histogram_has_30_bins_up_to_a_year(inventory):
+    data = InventoryAnalyzer(inventory).analyze_inventory()
+    days_remaining = data['Days_Stock_Remaining'].to_numpy()
+
+    bars = create_days_remaining_histogram(data).data[0]
+    counts, edges = np.histogram(days_remaining[days_remaining <= 365], bins=30)
+
+    assert len(bars.y) == 30
+    np.testing.assert_array_equal(bars.y, counts)
+    np.testing.assert_array_equal(bars.x, (edges[:-1] + edges[1:]) / 2)
+    assert sum(bars.y) == np.count_nonzero(days_remaining <= 365)
+
+
+def test_top_k_positions_matches_nlargest():
+    rng = np.random.default_rng(3)
+    for size in [21, 50, 1000]:
+        values = rng.integers(0, 8, size).astype(np.float64)
+        expected = pd.Series(values).nlargest(20).index.to_numpy()
+        np.testing.assert_array_equal(_top_k_positions(values, 20), expected)
+
+
+def test_reorder_top_rows_are_the_largest_reorders(inventory):
+    data = InventoryAnalyzer(inventory).analyze_inventory()
+    reorder_data = data[data['Reorder_Status'].isin(['Reorder Now', 'Reorder Soon'])]
+    expected = reorder_data.nlargest(20, 'Reorder_Quantity')
+
+    top_rows = _reorder_top_rows(data)
+
+    assert [row[0] for row in top_rows] == list(expected['Product_Name'].astype(str))
+    assert [row[1] for row in top_rows] == list(expected['Reorder_Quantity'])
+
+
+def test_abc_curve_is_colored_by_class(inventory):
+    data = InventoryAnalyzer(inventory).analyze_inventory()
+    sorted_value = data['Inventory_Value'].sort_values(ascending=False)
+    cumulative_pct = (sorted_value.cumsum() / sorted_value.sum() * 100).to_numpy()
+    expected_class = np.where(cumulative_pct <= 80, 'A', np.where(cumulative_pct <= 95, 'B', 'C'))
+
+    traces = create_abc_analysis_chart(build_chart_inputs(data)).data
+
+    assert [trace.name for trace in traces] == ['Class A', 'Class B', 'Class C']
+    covered = []
+    for i, trace in enumerate(traces):
+        ranks = np.asarray(trace.x)
+        np.testing.assert_allclose(np.asarray(trace.y), cumulative_pct[ranks])
+        # Later segments repeat the previous class's last point to join the line
+        own_ranks = ranks[1:] if i else ranks
+        assert set(expected_class[own_ranks]) == {trace.name[-1]}
+        covered.extend(own_ranks)
+    assert covered == list(range(len(data)))
@@ -1,7 +1,30 @@
 import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pa_csv
 import streamlit as st
 import io
-from typing import Union
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, Mapping, Tuple
+
+# Upload file types accepted by validate_file_format
+ALLOWED_EXTENSIONS = ('.csv', '.xlsx', '.xls')
+
+def hash_dataframe(data: pd.DataFrame) -> bytes:
+    """
+    Hash the full contents of a DataFrame for use as an st.cache_data key.
+    Streamlit's built-in DataFrame hash samples frames above 50k rows, so a
+    change outside the sample could otherwise return a stale result.
+    
+    Args:
+        data: DataFrame to hash
+        
+    Returns:
+        bytes: Row hashes prefixed with the column names and dtypes
+    """
+    schema = '|'.join(f"{col}:{dtype}" for col, dtype in data.dtypes.items())
+    return schema.encode() + pd.util.hash_pandas_object(data).to_numpy().tobytes()
 
 def validate_file_format(uploaded_file) -> bool:
     """
@@ -13,25 +36,58 @@ def validate_file_format(uploaded_file) -> bool:
     Returns:
         bool: True if file format is valid, False otherwise
     """
-    if uploaded_file is None:
-        return False
-    
-    allowed_extensions = ['.csv', '.xlsx', '.xls']
-    file_extension = '.' + uploaded_file.name.split('.')[-1].lower()
+    return uploaded_file is not None and uploaded_file.name.lower().endswith(ALLOWED_EXTENSIONS)
+
+def export_to_csv(data: pd.DataFrame) -> bytes:
+    """
+    Convert DataFrame to CSV bytes for download using Arrow's CSV writer.
+    The values read back the same as DataFrame.to_csv, but the text differs:
+    the header and every string field are quoted, and whole floats are
+    written without a trailing .0 (2.0 becomes 2).
     
-    return file_extension in allowed_extensions
+    Args:
+        data: DataFrame to export
+        
+    Returns:
+        bytes: UTF-8 encoded CSV
+    """
+    buffer = io.BytesIO()
+    pa_csv.write_csv(
+        pa.Table.from_pandas(data, preserve_index=False),
+        buffer,
+        pa_csv.WriteOptions(quoting_style='needed')
+    )
+    return buffer.getvalue()
 
-def export_to_csv(data: pd.DataFrame) -> str:
+def export_to_parquet(data: pd.DataFrame) -> bytes:
     """
-    Convert DataFrame to CSV string for download
+    Convert DataFrame to Parquet bytes for download
     
     Args:
         data: DataFrame to export
         
     Returns:
-        str: CSV string
+        bytes: Parquet file contents
+    """
+    buffer = io.BytesIO()
+    data.to_parquet(buffer, index=False)
+    return buffer.getvalue()
+
+@st.cache_resource(max_entries=8, show_spinner=False)
+def export_analysis(_data: pd.DataFrame, export_key: str) -> Tuple[bytes, bytes]:
+    """
+    CSV and Parquet downloads of an analysis frame, cached on the export key
+    only so reruns reuse the bytes instead of re-serializing. The frame is
+    not hashed, so callers must pass a key that changes with it.
+    
+    Args:
+        _data: DataFrame to export
+        export_key: Content key identifying _data (e.g. file hash and thresholds)
+        
+    Returns:
+        Tuple of (CSV bytes, Parquet bytes)
     """
-    return data.to_csv(index=False)
+    return export_to_csv(_data), export_to_parquet(_data)
 
 def format_currency(value: float) -> str:
     """
@@ -78,6 +134,70 @@ def calculate_safety_stock(sales_velocity: float, lead_time: int, service_level:
     
     return max(0, safety_stock)
 
+def calculate_safety_stock_batch(sales_velocity: np.ndarray, lead_time: np.ndarray,
+                                 service_level: float = 0.95) -> np.ndarray:
+    """
+    Vectorized calculate_safety_stock for many products at once, with the
+    same fixed 95% z-score and the same results
+    
+    Args:
+        sales_velocity: Average daily sales per product
+        lead_time: Lead time in days per product
+        service_level: Desired service level (default 95%)
+        
+    Returns:
+        np.ndarray: Recommended safety stock quantity per product
+    """
+    sales_velocity = np.asarray(sales_velocity, dtype=np.float64)
+    lead_time = np.asarray(lead_time, dtype=np.float64)
+    z_score = 1.65
+    
+    demand_std = sales_velocity * 0.3
+    safety_stock = z_score * demand_std * np.sqrt(lead_time)
+    
+    # fmax, like max(0, x), maps NaN to zero
+    return np.fmax(0.0, safety_stock)
+
+def compute_dashboard_aggregates(data: pd.DataFrame) -> Dict[str, pd.Series]:
+    """
+    Compute the aggregates behind the dashboard charts and summaries in a
+    single grouped pass over the analysis results
+    
+    Args:
+        data: DataFrame with analysis results
+        
+    Returns:
+        dict: Small Series of counts and totals, keyed by aggregate name
+    """
+    # One groupby over the three label columns gives a cube of at most
+    # 3 x 4 x 3 rows; every aggregate below is a marginal of that cube.
+    # observed=True keeps the cube to label combinations that occur, and
+    # sort=False skips ordering it since each marginal is sorted anyway
+    keys = ['Category', 'Stock_Status', 'Reorder_Status']
+    values = pd.DataFrame({
+        'inventory_value': data['Inventory_Value'],
+        'reorder_value': data['Reorder_Quantity'] * data['Unit_Cost']
+    })
+    cube = values.groupby([data[key] for key in keys], observed=True, sort=False).agg(
+        products=('inventory_value', 'size'),
+        inventory_value=('inventory_value', 'sum'),
+        reorder_value=('reorder_value', 'sum')
+    )
+    
+    def marginal(level: str, column: str) -> pd.Series:
+        # Largest first, ties in label order, matching value_counts
+        totals = cube.groupby(level=level, observed=True)[column].sum()
+        return totals.sort_values(ascending=False, kind='stable')
+    
+    return {
+        'category_counts': marginal('Category', 'products'),
+        'stock_counts': marginal('Stock_Status', 'products'),
+        'reorder_counts': marginal('Reorder_Status', 'products'),
+        'reorder_value_by_status': marginal('Reorder_Status', 'reorder_value'),
+        'inventory_value_by_category': marginal('Category', 'inventory_value')
+    }
+
+@st.cache_data(max_entries=16, show_spinner=False, hash_funcs={pd.DataFrame: hash_dataframe})
 def generate_reorder_summary(data: pd.DataFrame) -> dict:
     """
     Generate summary statistics for reorder recommendations
@@ -88,25 +208,27 @@ def generate_reorder_summary(data: pd.DataFrame) -> dict:
     Returns:
         dict: Summary statistics
     """
-    reorder_now = data[data['Reorder_Status'] == 'Reorder Now']
-    reorder_soon = data[data['Reorder_Status'] == 'Reorder Soon']
+    aggregates = compute_dashboard_aggregates(data)
+    reorder_counts = aggregates['reorder_counts']
+    stock_counts = aggregates['stock_counts']
+    
+    reorder_now_value = aggregates['reorder_value_by_status'].get('Reorder Now', 0.0)
+    reorder_soon_value = aggregates['reorder_value_by_status'].get('Reorder Soon', 0.0)
     
     summary = {
         'total_products': len(data),
-        'reorder_now_count': len(reorder_now),
-        'reorder_soon_count': len(reorder_soon),
-        'reorder_now_value': (reorder_now['Reorder_Quantity'] * reorder_now['Unit_Cost']).sum(),
-        'reorder_soon_value': (reorder_soon['Reorder_Quantity'] * reorder_soon['Unit_Cost']).sum(),
-        'total_reorder_value': (
-            (reorder_now['Reorder_Quantity'] * reorder_now['Unit_Cost']).sum() +
-            (reorder_soon['Reorder_Quantity'] * reorder_soon['Unit_Cost']).sum()
-        ),
-        'critical_stock_count': len(data[data['Stock_Status'] == 'Critical']),
-        'low_stock_count': len(data[data['Stock_Status'] == 'Low'])
+        'reorder_now_count': int(reorder_counts.get('Reorder Now', 0)),
+        'reorder_soon_count': int(reorder_counts.get('Reorder Soon', 0)),
+        'reorder_now_value': reorder_now_value,
+        'reorder_soon_value': reorder_soon_value,
+        'total_reorder_value': reorder_now_value + reorder_soon_value,
+        'critical_stock_count': int(stock_counts.get('Critical', 0)),
+        'low_stock_count': int(stock_counts.get('Low', 0))
     }
     
     return summary
 
+@st.cache_data(show_spinner=False)
 def create_sample_data_template() -> pd.DataFrame:
     """
     Create a sample data template for users to understand the required format
@@ -127,6 +249,7 @@ def create_sample_data_template() -> pd.DataFrame:
     
     return pd.DataFrame(sample_data)
 
+@st.cache_data(max_entries=16, show_spinner=False, hash_funcs={pd.DataFrame: hash_dataframe})
 def validate_data_quality(data: pd.DataFrame) -> dict:
     """
     Validate data quality and return quality metrics
@@ -140,35 +263,38 @@ def validate_data_quality(data: pd.DataFrame) -> dict:
     issues = []
     warnings = []
     
-    # Check for missing values
-    missing_data = data.isnull().sum()
-    if missing_data.any():
-        for col, count in missing_data.items():
-            if count > 0:
-                issues.append(f"{col}: {count} missing values")
-    
-    # Check for negative values in stock/sales
-    numeric_columns = ['Current_Stock', 'Sales_Last_30_Days', 'Unit_Cost']
-    for col in numeric_columns:
-        if col in data.columns:
-            negative_count = (data[col] < 0).sum()
-            if negative_count > 0:
-                issues.append(f"{col}: {negative_count} negative values")
+    # One missing-value matrix gives both the per-column counts and the
+    # number of complete records
+    missing = data.isna().to_numpy()
+    complete_records = int(np.count_nonzero(~missing.any(axis=1)))
+    for col, count in zip(data.columns, np.count_nonzero(missing, axis=0)):
+        if count > 0:
+            issues.append(f"{col}: {count} missing values")
+    
+    # Check for negative values in stock/sales on one float64 block
+    numeric_columns = [
+        col for col in ['Current_Stock', 'Sales_Last_30_Days', 'Unit_Cost'] if col in data.columns
+    ]
+    values = data[numeric_columns].to_numpy(dtype=np.float64, na_value=np.nan)
+    for col, negative_count in zip(numeric_columns, np.count_nonzero(values < 0, axis=0)):
+        if negative_count > 0:
+            issues.append(f"{col}: {negative_count} negative values")
+    columns = dict(zip(numeric_columns, values.T))
     
     # Check for zero unit costs
-    if 'Unit_Cost' in data.columns:
-        zero_cost_count = (data['Unit_Cost'] == 0).sum()
+    if 'Unit_Cost' in columns:
+        zero_cost_count = np.count_nonzero(columns['Unit_Cost'] == 0)
         if zero_cost_count > 0:
             warnings.append(f"Unit_Cost: {zero_cost_count} products with zero cost")
     
     # Check for products with no sales but high stock
-    if all(col in data.columns for col in ['Sales_Last_30_Days', 'Current_Stock']):
-        no_sales_high_stock = data[
-            (data['Sales_Last_30_Days'] == 0) & (data['Current_Stock'] > 100)
-        ]
-        if len(no_sales_high_stock) > 0:
+    if 'Sales_Last_30_Days' in columns and 'Current_Stock' in columns:
+        no_sales_high_stock = np.count_nonzero(
+            (columns['Sales_Last_30_Days'] == 0) & (columns['Current_Stock'] > 100)
+        )
+        if no_sales_high_stock > 0:
             warnings.append(
-                f"{len(no_sales_high_stock)} products with no sales but high stock levels"
+                f"{no_sales_high_stock} products with no sales but high stock levels"
             )
     
     quality_score = max(0, 100 - len(issues) * 10 - len(warnings) * 5)
@@ -178,18 +304,20 @@ def validate_data_quality(data: pd.DataFrame) -> dict:
         'issues': issues,
         'warnings': warnings,
         'total_records': len(data),
-        'complete_records': len(data.dropna()),
-        'completeness_percentage': (len(data.dropna()) / len(data)) * 100 if len(data) > 0 else 0
+        'complete_records': complete_records,
+        'completeness_percentage': (complete_records / len(data)) * 100 if len(data) > 0 else 0
     }
 
-def get_color_scheme() -> dict:
+@lru_cache(maxsize=1)
+def get_color_scheme() -> Mapping[str, Mapping[str, str]]:
     """
-    Get consistent color scheme for the application
+    Get consistent color scheme for the application. Built once and shared,
+    so the mappings are read-only.
     
     Returns:
-        dict: Color mappings for different categories
+        Mapping: Color mappings for different categories
     """
-    return {
+    scheme = {
         'categories': {
             'Slow Moving': '#FF6B6B',
             'Fast Moving': '#4ECDC4',
@@ -205,5 +333,12 @@ def get_color_scheme() -> dict:
             'Reorder Now': '#FF4444',
             'Reorder Soon': '#FF8C00',
             'No Action Needed': '#32CD32'
+        },
+        'abc_classes': {
+            'A': '#4169E1',
+            'B': '#4ECDC4',
+            'C': '#FF6B6B'
         }
     }
+    
+    return MappingProxyType({name: MappingProxyType(colors) for name, colors in scheme.items()})
@@ -3,26 +3,61 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import pandas as pd
 import numpy as np
+import streamlit as st
+from typing import Dict, Tuple
+from utils import compute_dashboard_aggregates, get_color_scheme, hash_dataframe
 
-def create_velocity_chart(data: pd.DataFrame):
+# Chart colors, bound once from the shared read-only application scheme
+_SCHEME = get_color_scheme()
+_CATEGORY_COLORS = _SCHEME['categories']
+_STOCK_STATUS_COLORS = _SCHEME['stock_status']
+_REORDER_STATUS_COLORS = _SCHEME['reorder_status']
+_ABC_CLASS_COLORS = _SCHEME['abc_classes']
+
+def build_chart_inputs(data: pd.DataFrame) -> Dict:
+    """
+    Compute the inputs of the summary charts in one place, so the page reads
+    the analysis results once and each chart receives only what it plots
+    
+    Args:
+        data: DataFrame with analysis results
+        
+    Returns:
+        dict: The utils.compute_dashboard_aggregates Series, plus the reorder
+        chart rows and the inventory values sorted largest first
+    """
+    chart_inputs = compute_dashboard_aggregates(data)
+    chart_inputs['reorder_top_rows'] = _reorder_top_rows(data)
+    chart_inputs['sorted_inventory_value'] = np.sort(
+        data['Inventory_Value'].to_numpy(dtype=np.float64)
+    )[::-1]
+    
+    return chart_inputs
+
+def create_velocity_chart(chart_inputs: Dict):
     """
-    Create a chart showing sales velocity distribution by category
+    Create a chart showing sales velocity distribution by category, from
+    the output of build_chart_inputs
     """
     # Category distribution pie chart
-    category_counts = data['Category'].value_counts()
+    category_counts = chart_inputs['category_counts']
+    category_counts = category_counts[category_counts > 0]
     
-    colors = {
-        'Slow Moving': '#FF6B6B',
-        'Fast Moving': '#4ECDC4', 
-        'Best Selling': '#45B7D1'
-    }
+    return _velocity_figure(tuple((str(k), int(v)) for k, v in category_counts.items()))
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def _velocity_figure(category_counts: Tuple[Tuple[str, int], ...]):
+    """
+    Build the velocity pie chart, cached on the (category, count) pairs
+    """
+    names, counts = zip(*category_counts) if category_counts else ((), ())
     
     fig = px.pie(
-        values=category_counts.values,
-        names=category_counts.index,
+        values=counts,
+        names=names,
         title="Product Distribution by Sales Velocity",
-        color=category_counts.index,
-        color_discrete_map=colors
+        color=names,
+        color_discrete_map=_CATEGORY_COLORS
     )
     
     fig.update_traces(
@@ -39,26 +74,30 @@ def create_velocity_chart(data: pd.DataFrame):
     
     return fig
 
-def create_stock_level_chart(data: pd.DataFrame):
+def create_stock_level_chart(chart_inputs: Dict):
     """
-    Create a chart showing stock level distribution
+    Create a chart showing stock level distribution, from the output of
+    build_chart_inputs
     """
     # Stock status distribution
-    stock_counts = data['Stock_Status'].value_counts()
+    stock_counts = chart_inputs['stock_counts']
+    stock_counts = stock_counts[stock_counts > 0]
     
-    colors = {
-        'Critical': '#FF4444',
-        'Low': '#FF8C00',
-        'Normal': '#32CD32',
-        'High': '#4169E1'
-    }
+    return _stock_level_figure(tuple((str(k), int(v)) for k, v in stock_counts.items()))
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def _stock_level_figure(stock_counts: Tuple[Tuple[str, int], ...]):
+    """
+    Build the stock level bar chart, cached on the (status, count) pairs
+    """
+    statuses, counts = zip(*stock_counts) if stock_counts else ((), ())
     
     fig = px.bar(
-        x=stock_counts.index,
-        y=stock_counts.values,
+        x=statuses,
+        y=counts,
         title="Stock Level Distribution",
-        color=stock_counts.index,
-        color_discrete_map=colors,
+        color=statuses,
+        color_discrete_map=_STOCK_STATUS_COLORS,
         labels={'x': 'Stock Status', 'y': 'Number of Products'}
     )
     
@@ -75,14 +114,56 @@ def create_stock_level_chart(data: pd.DataFrame):
     
     return fig
 
-def create_reorder_chart(data: pd.DataFrame):
+def _top_k_positions(values: np.ndarray, k: int) -> np.ndarray:
+    """
+    Positions of the k largest values, largest first, in O(n) rather than a
+    full sort. Ties resolve to the earliest position, like nlargest(keep='first').
+    """
+    k = min(k, len(values))
+    if k == 0:
+        return np.empty(0, dtype=np.intp)
+    
+    # Partial selection finds the k-th largest value; everything above it is
+    # in, and ties at the boundary are filled in position order
+    kth_value = np.partition(values, len(values) - k)[len(values) - k]
+    above = np.flatnonzero(values > kth_value)
+    ties = np.flatnonzero(values == kth_value)[:k - len(above)]
+    top = np.concatenate([above, ties])
+    
+    # Order only the k selected rows: value descending, then position
+    return top[np.lexsort((top, -values[top]))]
+
+def _reorder_top_rows(data: pd.DataFrame) -> Tuple[Tuple[str, float, str], ...]:
     """
-    Create a chart showing reorder recommendations
+    The (name, quantity, status) rows of the 20 largest reorders
     """
-    # Filter products that need reordering
-    reorder_data = data[data['Reorder_Status'].isin(['Reorder Now', 'Reorder Soon'])]
+    # Positions of products that need reordering; no filtered frame is built
+    reorder_idx = np.flatnonzero(
+        data['Reorder_Status'].isin(['Reorder Now', 'Reorder Soon']).to_numpy(dtype=bool)
+    )
+    
+    # Only the top 20 rows are plotted, so they are all the figure depends
+    # on; only those rows of the three plotted columns are copied
+    quantities = data['Reorder_Quantity'].to_numpy(dtype=np.float64)[reorder_idx]
+    top = reorder_idx[_top_k_positions(quantities, 20)]
+    plotted_columns = data.columns.get_indexer(['Product_Name', 'Reorder_Quantity', 'Reorder_Status'])
+    top_rows = data.iloc[top, plotted_columns].astype({'Product_Name': str, 'Reorder_Status': str})
     
-    if reorder_data.empty:
+    return tuple(top_rows.itertuples(index=False, name=None))
+
+def create_reorder_chart(chart_inputs: Dict):
+    """
+    Create a chart showing reorder recommendations, from the output of
+    build_chart_inputs
+    """
+    return _reorder_figure(chart_inputs['reorder_top_rows'])
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def _reorder_figure(top_rows: Tuple[Tuple[str, float, str], ...]):
+    """
+    Build the reorder bar chart, cached on its (name, quantity, status) rows
+    """
+    if not top_rows:
         # Create empty chart with message
         fig = go.Figure()
         fig.add_annotation(
@@ -100,13 +181,9 @@ def create_reorder_chart(data: pd.DataFrame):
         )
         return fig
     
-    # Sort by reorder quantity for better visualization
-    reorder_data = reorder_data.nlargest(20, 'Reorder_Quantity')
-    
-    colors = {
-        'Reorder Now': '#FF4444',
-        'Reorder Soon': '#FF8C00'
-    }
+    reorder_data = pd.DataFrame(
+        list(top_rows), columns=['Product_Name', 'Reorder_Quantity', 'Reorder_Status']
+    )
     
     fig = px.bar(
         reorder_data,
@@ -114,7 +191,7 @@ def create_reorder_chart(data: pd.DataFrame):
         y='Reorder_Quantity',
         color='Reorder_Status',
         title="Top Products Requiring Reorder",
-        color_discrete_map=colors,
+        color_discrete_map=_REORDER_STATUS_COLORS,
         labels={'Reorder_Quantity': 'Reorder Quantity', 'Product_Name': 'Product'}
     )
     
@@ -131,6 +208,7 @@ def create_reorder_chart(data: pd.DataFrame):
     
     return fig
 
+@st.cache_data(max_entries=16, show_spinner=False, hash_funcs={pd.DataFrame: hash_dataframe})
 def create_sales_velocity_scatter(data: pd.DataFrame):
     """
     Create a scatter plot of sales velocity vs current stock
@@ -165,24 +243,30 @@ def create_sales_velocity_scatter(data: pd.DataFrame):
     
     return fig
 
-def create_inventory_value_chart(data: pd.DataFrame):
+def create_inventory_value_chart(chart_inputs: Dict):
     """
-    Create a chart showing inventory value by category
+    Create a chart showing inventory value by category, from the output of
+    build_chart_inputs
     """
-    # Calculate inventory value by category
-    category_values = data.groupby('Category')['Inventory_Value'].sum().sort_values(ascending=False)
+    # Inventory value by category, largest first
+    category_values = chart_inputs['inventory_value_by_category']
+    
+    return _inventory_value_figure(tuple((str(k), float(v)) for k, v in category_values.items()))
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def _inventory_value_figure(category_values: Tuple[Tuple[str, float], ...]):
+    """
+    Build the inventory value bar chart, cached on the (category, value) pairs
+    """
+    categories, values = zip(*category_values) if category_values else ((), ())
     
     fig = px.bar(
-        x=category_values.index,
-        y=category_values.values,
+        x=categories,
+        y=values,
         title="Total Inventory Value by Category",
         labels={'x': 'Category', 'y': 'Inventory Value ($)'},
-        color=category_values.index,
-        color_discrete_map={
-            'Slow Moving': '#FF6B6B',
-            'Fast Moving': '#4ECDC4',
-            'Best Selling': '#45B7D1'
-        }
+        color=categories,
+        color_discrete_map=_CATEGORY_COLORS
     )
     
     fig.update_traces(
@@ -197,20 +281,31 @@ def create_inventory_value_chart(data: pd.DataFrame):
     
     return fig
 
+@st.cache_data(max_entries=16, show_spinner=False, hash_funcs={pd.DataFrame: hash_dataframe})
 def create_days_remaining_histogram(data: pd.DataFrame):
     """
     Create a histogram showing distribution of days stock remaining
     """
-    # Filter out extremely high values for better visualization
-    filtered_data = data[data['Days_Stock_Remaining'] <= 365]  # Max 1 year
+    # Filter out extremely high values for better visualization, then bin
+    # server-side so only the 30 bin counts are sent to the browser
+    days_remaining = data['Days_Stock_Remaining'].to_numpy(dtype=np.float64)
+    counts, edges = np.histogram(days_remaining[days_remaining <= 365], bins=30)  # Max 1 year
+    
+    fig = go.Figure(go.Bar(
+        x=(edges[:-1] + edges[1:]) / 2,
+        y=counts,
+        width=np.diff(edges),
+        customdata=np.column_stack([edges[:-1], edges[1:]]),
+        marker_color='#45B7D1',
+        hovertemplate='Days Stock Remaining: %{customdata[0]:.1f} - %{customdata[1]:.1f}<br>'
+                      'Number of Products: %{y}<extra></extra>'
+    ))
     
-    fig = px.histogram(
-        filtered_data,
-        x='Days_Stock_Remaining',
-        nbins=30,
+    fig.update_layout(
         title="Distribution of Days Stock Remaining",
-        labels={'Days_Stock_Remaining': 'Days Stock Remaining', 'count': 'Number of Products'},
-        color_discrete_sequence=['#45B7D1']
+        xaxis_title="Days Stock Remaining",
+        yaxis_title="Number of Products",
+        bargap=0
     )
     
     fig.add_vline(
@@ -235,33 +330,51 @@ def create_days_remaining_histogram(data: pd.DataFrame):
     
     return fig
 
-def create_abc_analysis_chart(data: pd.DataFrame):
+def create_abc_analysis_chart(chart_inputs: Dict):
+    """
+    Create ABC analysis chart based on inventory value, from the output of
+    build_chart_inputs
+    """
+    return _abc_figure(chart_inputs['sorted_inventory_value'])
+
+# Streamlit samples large arrays when hashing; hash every value instead
+@st.cache_data(max_entries=16, show_spinner=False, hash_funcs={np.ndarray: np.ndarray.tobytes})
+def _abc_figure(values: np.ndarray):
     """
-    Create ABC analysis chart based on inventory value
+    Build the ABC analysis chart, cached on the inventory values sorted
+    largest first
     """
-    # Calculate cumulative value percentage
-    sorted_data = data.sort_values('Inventory_Value', ascending=False).copy()
-    sorted_data['Cumulative_Value'] = sorted_data['Inventory_Value'].cumsum()
-    total_value = sorted_data['Inventory_Value'].sum()
-    sorted_data['Cumulative_Percentage'] = (sorted_data['Cumulative_Value'] / total_value) * 100
-    
-    # Classify into ABC categories
-    def classify_abc(cum_pct):
-        if cum_pct <= 80:
-            return 'A'
-        elif cum_pct <= 95:
-            return 'B'
-        else:
-            return 'C'
-    
-    sorted_data['ABC_Category'] = sorted_data['Cumulative_Percentage'].apply(classify_abc)
-    
-    fig = px.line(
-        sorted_data.reset_index(),
-        x='index',
-        y='Cumulative_Percentage',
+    # Cumulative value percentage: one cumsum, scaled in place
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cumulative_pct = values.cumsum()
+        cumulative_pct *= 100.0 / values.sum()
+    
+    # Classify into ABC classes: A up to 80%, B up to 95%, C beyond. Values
+    # are non-negative and sorted, so the curve is monotone and each class
+    # is one contiguous run of ranks
+    ranks = np.arange(len(cumulative_pct))
+    class_ends = np.searchsorted(cumulative_pct, [80, 95], side='right')
+    bounds = [0, *class_ends, len(cumulative_pct)]
+    
+    # One line segment per class, colored by class. Each starts at the last
+    # point of the previous class so the curve stays unbroken
+    fig = go.Figure()
+    for abc_class, start, end in zip('ABC', bounds[:-1], bounds[1:]):
+        if end > start:
+            segment = slice(max(start - 1, 0), end)
+            fig.add_trace(go.Scatter(
+                x=ranks[segment],
+                y=cumulative_pct[segment],
+                mode='lines',
+                name=f"Class {abc_class}",
+                line_color=_ABC_CLASS_COLORS[abc_class],
+                hovertemplate='Product Rank=%{x}<br>Cumulative Value %=%{y}<extra></extra>'
+            ))
+    
+    fig.update_layout(
         title="ABC Analysis - Cumulative Inventory Value",
-        labels={'index': 'Product Rank', 'Cumulative_Percentage': 'Cumulative Value %'}
+        xaxis_title="Product Rank",
+        yaxis_title="Cumulative Value %"
     )
     
     # Add horizontal lines for ABC boundaries